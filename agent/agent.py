@@ -4,7 +4,7 @@ Nora: AI Voice Agent with Beyond Presence Avatar + Orgo Browser Control
 
 Based on the official bey-examples livekit-agent implementation.
 Uses OpenAI's Realtime API for voice-to-voice conversation.
-Integrates Orgo.ai for browser control capabilities.
+Integrates Orgo.ai (or a local headless Chromium) for browser control capabilities.
 
 Updated to use LiveKit Agents v1.0 API patterns.
 """
@@ -13,8 +13,10 @@ import asyncio
 import base64
 import json
 import os
+import signal
 import sys
 import logging
+from typing import Optional
 
 from dotenv import load_dotenv
 from livekit.agents import (
@@ -29,18 +31,23 @@ from livekit.agents import (
     function_tool,
 )
 from livekit.plugins import bey, openai
-from orgo import Computer
+from browser_backend import BrowserBackend, create_browser_backend
+from browser_stream import BrowserStream
+from context_compactor import ContextCompactor
+from drain import DrainCoordinator, load_checkpoint, resume_prompt
+from observability import Span, get_tracer, setup_logging
 from telegram_service import get_telegram_service
 
 # Load environment variables from parent directory's .env file
 load_dotenv(dotenv_path="../.env")
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger("nora-agent")
+tracer = get_tracer()
+
+# Drain deadlines: how long an in-flight browser task may run on shutdown, and
+# how long each of the Telegram send wait and browser release may take
+TASK_DRAIN_SECONDS = float(os.environ.get("NORA_TASK_DRAIN_SECONDS", "45"))
+SEND_DRAIN_SECONDS = 10.0
 
 # System prompt for Nora's personality with browser and messaging capabilities
 SYSTEM_PROMPT = """You are Nora, a friendly AI assistant helping Rana, an elderly user. You can control a web browser and send/receive Telegram messages.
@@ -49,6 +56,7 @@ CAPABILITIES:
 - You can browse the web, search for information, shop online, fill forms, etc.
 - You can send and receive Telegram messages to/from family and friends
 - When the user asks you to do something on the web, use the browse_and_act tool
+- When the user only wants a website opened, use the open_website tool (it is much faster)
 - When the user wants to send a message, use the send_telegram_message tool
 - Messages arrive automatically and you will read them aloud when they come in
 
@@ -93,14 +101,41 @@ IMPORTANT:
 class NoraAgent(Agent):
     """Nora voice agent with browser control and Telegram messaging capabilities"""
 
-    def __init__(self, computer: Computer = None, room=None, telegram_service=None):
+    def __init__(self, browser: BrowserBackend = None, room=None, telegram_service=None, browser_stream: BrowserStream = None):
         super().__init__(instructions=SYSTEM_PROMPT)
-        self.computer = computer
+        self.browser = browser
         self.room = room
         self.telegram = telegram_service
+        self.browser_stream = browser_stream
         # Track browser state for message queuing
         self.browser_busy = False
         self.queued_messages: list[dict] = []
+        # Drain state: set while in-flight work is being wound down on shutdown
+        self.draining = False
+        self.current_task: Optional[str] = None
+        self.browser_idle = asyncio.Event()
+        self.browser_idle.set()
+        # Tracing: voice turns still open, and the trace each reply's tool calls belong to
+        self.open_turns: list[Span] = []
+        self._speech_traces: dict[str, Span] = {}
+
+    def _trace_for(self, context: RunContext) -> Optional[Span]:
+        """
+        Pick the trace a tool call belongs to.
+
+        Replies we start ourselves (e.g. Telegram announcements) already carry
+        their trace in the context. Otherwise the reply is bound to the latest
+        voice turn the first time one of its tools runs, so a transcript that
+        arrives mid-reply does not move the remaining tool calls.
+        """
+        if tracer.active_span():
+            return None
+        speech = context.speech_handle
+        root = self._speech_traces.get(speech.id)
+        if root is None and self.open_turns:
+            root = self._speech_traces[speech.id] = self.open_turns[-1]
+            speech.add_done_callback(lambda _: self._speech_traces.pop(speech.id, None))
+        return root
 
     async def publish_browser_status(self, status_type: str):
         """Publish browser task status to frontend via data channel."""
@@ -108,14 +143,15 @@ class NoraAgent(Agent):
             logger.warning("No room available to publish browser status")
             return
         try:
-            status_data = json.dumps({"type": status_type})
-            await self.room.local_participant.publish_data(
-                status_data.encode(),
-                reliable=True
-            )
-            logger.info(f"Published browser status: {status_type}")
+            with tracer.span("datachannel.publish", type=status_type):
+                status_data = json.dumps({"type": status_type})
+                await self.room.local_participant.publish_data(
+                    status_data.encode(),
+                    reliable=True
+                )
+            logger.debug("Published browser status: %s", status_type)
         except Exception as e:
-            logger.error(f"Failed to publish browser status: {e}")
+            logger.error("Failed to publish browser status: %s", e)
 
     @function_tool()
     async def browse_and_act(self, context: RunContext, instruction: str) -> str:
@@ -127,54 +163,49 @@ class NoraAgent(Agent):
         Args:
             instruction: The task to perform in the browser, e.g. "Go to Amazon and add bananas to cart"
         """
-        logger.info(f"Starting browser task: {instruction}")
+        with tracer.activate(self._trace_for(context)), \
+                tracer.span("tool.browse_and_act", instruction_chars=len(instruction)):
+            return await self._browse_and_act(instruction)
+
+    async def _browse_and_act(self, instruction: str) -> str:
+        logger.info("Starting browser task", extra={"instruction_chars": len(instruction)})
 
-        if not self.computer:
-            logger.error("No Orgo computer available for browser tasks")
+        if not self.browser:
+            logger.error("No browser backend available for browser tasks")
             return "I'm sorry, the browser is not available right now."
 
+        if self.draining:
+            logger.info("Refusing browser task while draining")
+            return "I'm about to restart, so I can't start that right now. Please ask me again in a minute."
+
         # Mark browser as busy - messages will be queued
         self.browser_busy = True
+        self.current_task = instruction
+        self.browser_idle.clear()
+        if self.browser_stream:
+            self.browser_stream.set_active(True)
         
         # Notify frontend that browser task is starting
         await self.publish_browser_status("browser_task_started")
 
         try:
 
-            # Build instruction with context
-            full_instruction = f"""IMPORTANT: Always use English. For Amazon, navigate to amazon.com (US), not regional variants.
-
-TASK: {instruction}"""
-
-            # Use Orgo's hosted agent service for reliable execution
-            result = await asyncio.to_thread(
-                self.computer.prompt,
-                instruction=full_instruction,
-                model="claude-sonnet-4-5-20250929",  # Claude Sonnet 4.5
-                max_iterations=30,  # Limit agent loops per docs
-                verbose=True,  # Show detailed logs
-            )
-
-            logger.info(f"Browser task completed successfully")
-            logger.info(f"Orgo result type: {type(result)}")
-            
-            # Simplify the result for Nora - extract just the summary
-            if isinstance(result, str):
-                # Already a string, use as is but limit length
-                summary = result[:500] if len(result) > 500 else result
-            elif isinstance(result, list):
-                # List of messages - extract the last text response
-                summary = "Task completed."
-                for msg in reversed(result):
-                    if isinstance(msg, dict) and msg.get("role") == "assistant":
-                        content = msg.get("content", [])
-                        for item in content:
-                            if isinstance(item, dict) and item.get("type") == "text":
-                                summary = item.get("text", "Task completed.")[:500]
-                                break
-                        break
-            else:
-                summary = f"Browser task completed: {str(result)[:200]}"
+            with tracer.span("browser.prompt", backend=self.browser.name) as span:
+                def on_progress(event_type, event_data):
+                    # Runs in the worker thread; record iterations on the span instead of printing
+                    if event_type == "tool_use":
+                        action = event_data.get("action") if isinstance(event_data, dict) else None
+                        span.add_event("tool_use", action=action)
+
+                summary = await asyncio.to_thread(
+                    self.browser.prompt,
+                    instruction,
+                    max_iterations=30,  # Limit agent loops per docs
+                    callback=on_progress,
+                )
+                span.set(iterations=len(span.events))
+
+            logger.info("Browser task completed successfully")
             
             # Check if any messages came in while browsing
             if self.queued_messages:
@@ -186,34 +217,60 @@ TASK: {instruction}"""
                 
                 # Append message info to result so Nora mentions it
                 summary += f"\n\nAlso, while I was browsing, you received {queued_count} new message(s): {' | '.join(message_texts)}"
-                logger.info(f"Announcing {queued_count} queued message(s) after browser task")
+                logger.info("Announcing %d queued message(s) after browser task", queued_count)
             
             return summary
         except Exception as e:
-            logger.error(f"Browser task failed: {e}")
+            logger.error("Browser task failed: %s", e)
             return f"I encountered an error while trying to do that: {str(e)}"
         finally:
             # Mark browser as not busy
             self.browser_busy = False
+            self.current_task = None
+            self.browser_idle.set()
+            if self.browser_stream:
+                self.browser_stream.set_active(False)
             # Always notify frontend that browser task is done
             await self.publish_browser_status("browser_task_completed")
 
     @function_tool()
     async def take_screenshot(self, context: RunContext) -> str:
         """Take a screenshot of the current browser state."""
-        if not self.computer:
+        if not self.browser:
             return "Browser is not available."
         try:
             # Run blocking I/O in thread
-            image_bytes = await asyncio.to_thread(self.computer.screenshot)
+            with tracer.activate(self._trace_for(context)), tracer.span("tool.take_screenshot"):
+                image_bytes = await asyncio.to_thread(self.browser.screenshot)
 
             # Convert bytes to base64 string
             base64_image = base64.b64encode(image_bytes).decode('utf-8')
             return f"data:image/png;base64,{base64_image}"
         except Exception as e:
-            logger.error(f"Screenshot failed: {e}")
+            logger.error("Screenshot failed: %s", e)
             return f"Failed to take screenshot: {str(e)}"
 
+    @function_tool()
+    async def open_website(self, context: RunContext, url: str) -> str:
+        """
+        Open a website in the browser without performing any other steps.
+        Use this instead of browse_and_act when the user only wants to see a page.
+
+        Args:
+            url: The address to open, e.g. "amazon.com"
+        """
+        if not self.browser:
+            return "Browser is not available."
+        try:
+            with tracer.activate(self._trace_for(context)), tracer.span("tool.open_website"):
+                await asyncio.to_thread(self.browser.navigate, url)
+            if self.browser_stream:
+                self.browser_stream.refresh()
+            return f"Opened {url}."
+        except Exception as e:
+            logger.error("Navigation failed: %s", e)
+            return f"I couldn't open that page: {str(e)}"
+
     @function_tool()
     async def send_telegram_message(self, context: RunContext, message: str) -> str:
         """
@@ -226,16 +283,17 @@ TASK: {instruction}"""
         if not self.telegram:
             return "Messaging is not available right now."
         
-        logger.info(f"Sending Telegram message: {message[:50]}...")
+        logger.info("Sending Telegram message", extra={"message_chars": len(message)})
         
         try:
-            success = await asyncio.to_thread(self.telegram.send_message, message)
+            with tracer.activate(self._trace_for(context)), tracer.span("tool.send_telegram_message"):
+                success = await asyncio.to_thread(self.telegram.send_message, message)
             if success:
                 return f"Message sent to Rana successfully."
             else:
                 return "I couldn't send that message. Please try again."
         except Exception as e:
-            logger.error(f"Failed to send Telegram message: {e}")
+            logger.error("Failed to send Telegram message: %s", e)
             return f"There was a problem sending the message: {str(e)}"
 
     @function_tool()
@@ -250,7 +308,8 @@ TASK: {instruction}"""
         logger.info("Checking for new Telegram messages")
         
         try:
-            messages = await asyncio.to_thread(self.telegram.poll_messages)
+            with tracer.activate(self._trace_for(context)), tracer.span("tool.check_telegram_messages"):
+                messages = await asyncio.to_thread(self.telegram.poll_messages)
             
             if not messages:
                 return "No new messages."
@@ -262,82 +321,29 @@ TASK: {instruction}"""
             
             return " ".join(result_parts)
         except Exception as e:
-            logger.error(f"Failed to check Telegram messages: {e}")
+            logger.error("Failed to check Telegram messages: %s", e)
             return f"I couldn't check messages right now: {str(e)}"
 
 
-async def publish_vnc_credentials_with_retry(room, max_retries: int = 5, delay: float = 1.0):
-    """
-    Publish VNC credentials with retries to handle race condition.
-
-    VNC credentials are read from environment variables:
-    - ORGO_VNC_HOST: The VNC hostname (e.g., orgo-computer-p9noby06.orgo.dev)
-    - ORGO_VNC_PASSWORD: The VNC password (from Orgo dashboard -> Computer Settings)
-    """
-    vnc_host = os.environ.get("ORGO_VNC_HOST")
-    vnc_password = os.environ.get("ORGO_VNC_PASSWORD")
-    
-    if not vnc_host or not vnc_password:
-        logger.warning("VNC credentials not configured. Set ORGO_VNC_HOST and ORGO_VNC_PASSWORD in .env")
-        logger.warning("Get these from Orgo dashboard -> Computer Settings")
-        return False
-    
-    browser_data = json.dumps({
-        "type": "browser_ready",
-        "hostname": vnc_host,
-        "password": vnc_password
-    })
-
-    for attempt in range(max_retries):
-        try:
-            await room.local_participant.publish_data(
-                browser_data.encode(),
-                reliable=True
-            )
-            logger.info(f"VNC credentials published (attempt {attempt + 1}/{max_retries})")
-
-            # Publish multiple times to ensure frontend receives it
-            if attempt < 2:
-                await asyncio.sleep(delay)
-                continue
-            return True
-        except Exception as e:
-            logger.warning(f"Failed to publish VNC credentials (attempt {attempt + 1}): {e}")
-            await asyncio.sleep(delay)
-
-    logger.error("Failed to publish VNC credentials after all retries")
-    return False
-
-
 async def entrypoint(ctx: JobContext) -> None:
     """Main entry point for the agent."""
+    # Configure logging here rather than at import, so LiveKit's own handlers
+    # (installed by the CLI / job process) are routed through the queue too
+    setup_logging(level=logging.INFO)
     logger.info(f"Agent connecting to room: {ctx.room.name}")
 
     # Connect to room, only subscribing to audio
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
     logger.info("Connected to room")
 
-    # Initialize Orgo Computer for browser control
-    computer = None
+    # Initialize the browser backend (Orgo VM or local headless Chromium)
+    browser = None
     try:
-        # Use existing persistent computer if ID provided
-        computer_id = os.environ.get("ORGO_COMPUTER_ID")
-        api_key = os.environ.get("ORGO_API_KEY")
-        
-        if not api_key:
-            logger.error("ORGO_API_KEY not set in environment")
-            raise ValueError("ORGO_API_KEY required for browser control")
-        
-        if computer_id:
-            # Explicitly pass api_key to ensure SDK uses correct credentials
-            computer = Computer(computer_id=computer_id, api_key=api_key)
-            logger.info(f"Connected to existing Orgo Computer: {computer_id}")
-        else:
-            computer = Computer(api_key=api_key)
-            logger.info(f"Created new Orgo Computer")
-        logger.info(f"Orgo Computer URL: {computer.url}")
+        # Launching Chromium or waiting for a free context must not block the job's event loop
+        browser = await asyncio.to_thread(create_browser_backend)
+        logger.info(f"Browser backend ready: {browser.name}")
     except Exception as e:
-        logger.warning(f"Failed to initialize Orgo Computer: {e}")
+        logger.warning(f"Failed to initialize browser backend: {e}")
         logger.warning("Browser control will not be available")
 
     # Create the voice agent session using OpenAI's Realtime API
@@ -353,17 +359,41 @@ async def entrypoint(ctx: JobContext) -> None:
     logger.info("Telegram service initialized")
     logger.info(f"  - Contact: {telegram_service.CONTACT_NAME}")
 
+    # Stream the browser screen into the room as a video track shared by all viewers
+    browser_stream = BrowserStream(browser, ctx.room) if browser else None
+
     # Create the Nora agent with browser tools and Telegram
     # In v1.0, tools decorated with @function_tool() are automatically registered
-    nora_agent = NoraAgent(computer=computer, room=ctx.room, telegram_service=telegram_service)
+    nora_agent = NoraAgent(
+        browser=browser,
+        room=ctx.room,
+        telegram_service=telegram_service,
+        browser_stream=browser_stream,
+    )
     
-    if computer:
+    if browser:
         logger.info(f"NoraAgent created with browser and messaging capabilities")
-        logger.info(f"  - Tools: browse_and_act, take_screenshot, send_telegram_message, check_telegram_messages")
+        logger.info(f"  - Tools: browse_and_act, open_website, take_screenshot, send_telegram_message, check_telegram_messages")
     else:
-        logger.info("NoraAgent created with messaging only (Orgo not available)")
+        logger.info("NoraAgent created with messaging only (browser not available)")
         logger.info(f"  - Tools: send_telegram_message, check_telegram_messages")
 
+    # On shutdown (worker drain or room closing), wind down in-flight work.
+    # Registered before anything below can return early or raise, so the
+    # browser backend (owned Orgo computer / Chromium lease) is always released.
+    # Checkpoints follow the contact, since every session gets a new room
+    checkpoint_key = f"telegram-{telegram_service.CONTACT_CHAT_ID}"
+    drain_coordinator = DrainCoordinator(
+        nora_agent,
+        ctx.room,
+        checkpoint_key,
+        telegram_service=telegram_service,
+        browser_stream=browser_stream,
+        task_deadline=TASK_DRAIN_SECONDS,
+        send_deadline=SEND_DRAIN_SECONDS,
+    )
+    ctx.add_shutdown_callback(drain_coordinator.drain)
+
     # Initialize Beyond Presence avatar
     avatar_id = os.environ.get("BEY_AVATAR_ID")
     if not avatar_id:
@@ -377,6 +407,44 @@ async def entrypoint(ctx: JobContext) -> None:
     await voice_agent_session.start(agent=nora_agent, room=ctx.room)
     logger.info("Voice agent session started")
 
+    # Keep the realtime context under budget for long-running sessions
+    context_compactor = ContextCompactor(
+        nora_agent,
+        token_budget=int(os.environ.get("NORA_CONTEXT_TOKEN_BUDGET", "12000")),
+    )
+    context_compactor.attach(voice_agent_session)
+
+    # Each final user transcript opens a trace; tool calls, Orgo iterations,
+    # data-channel publishes and Telegram sends are recorded as spans under it.
+    # The trace closes when the agent goes back to listening.
+    @voice_agent_session.on("user_input_transcribed")
+    def on_user_input_transcribed(event):
+        if event.is_final:
+            nora_agent.open_turns.append(
+                tracer.start_trace("voice_turn", transcript_chars=len(event.transcript))
+            )
+
+    @voice_agent_session.on("agent_state_changed")
+    def on_agent_state_changed(event):
+        if event.new_state == "listening":
+            for root in nora_agent.open_turns:
+                tracer.end_trace(root)
+            nora_agent.open_turns.clear()
+
+    # Dump the span ring buffer on demand: kill -USR1 <pid>
+    trace_dump_path = os.environ.get("NORA_TRACE_DUMP_PATH", "nora-traces.jsonl")
+
+    def dump_traces():
+        async def write():
+            count = await asyncio.to_thread(tracer.dump_to_file, trace_dump_path)
+            logger.info("Dumped %d spans to %s", count, trace_dump_path)
+        asyncio.create_task(write())
+
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, dump_traces)
+    except (NotImplementedError, RuntimeError, AttributeError):
+        logger.debug("Trace dump signal handler not available on this platform")
+
     # Start the avatar session (connects avatar to the voice agent's audio)
     await bey_avatar_session.start(voice_agent_session, room=ctx.room)
     logger.info("Avatar session started")
@@ -387,12 +455,12 @@ async def entrypoint(ctx: JobContext) -> None:
     
     def on_telegram_message(msg: dict):
         """Callback when a new Telegram message arrives - inject it into the conversation."""
-        logger.info(f"New Telegram message from {msg['from_name']}: {msg['text'][:50]}...")
+        logger.info("New Telegram message", extra={"text_chars": len(msg["text"])})
         
         # If browser is busy, queue the message for later
         if nora_agent.browser_busy:
             nora_agent.queued_messages.append(msg)
-            logger.info(f"Message queued (browser busy) - will announce after browsing")
+            logger.info("Message queued (browser busy) - will announce after browsing")
             return
         
         # Browser not busy - announce immediately
@@ -400,17 +468,31 @@ async def entrypoint(ctx: JobContext) -> None:
         
         # Use call_soon_threadsafe since this callback runs in a different thread
         def schedule_announcement():
-            asyncio.create_task(voice_agent_session.generate_reply(user_input=announcement))
+            # The reply (and any tools it calls) inherits this trace via the context
+            root = tracer.start_trace("telegram_inbound", text_chars=len(msg["text"]))
+            with tracer.activate(root):
+                speech = voice_agent_session.generate_reply(user_input=announcement)
+            speech.add_done_callback(lambda _: tracer.end_trace(root))
         
         loop.call_soon_threadsafe(schedule_announcement)
     
     telegram_service.start_listener(on_telegram_message, poll_interval=2)
     logger.info("Telegram listener started - incoming messages will be read aloud")
 
-    # Publish VNC credentials AFTER sessions start to avoid race condition
-    # VNC credentials are read from ORGO_VNC_HOST and ORGO_VNC_PASSWORD env vars
-    await asyncio.sleep(0.5)  # Small delay for frontend listener setup
-    asyncio.create_task(publish_vnc_credentials_with_retry(ctx.room))
+    # Publish the browser track AFTER sessions start so the avatar joins first
+    if browser_stream:
+        try:
+            await browser_stream.start()
+            logger.info("Browser stream started")
+        except Exception as e:
+            logger.warning(f"Failed to start browser stream: {e}")
+
+    # Resume whatever this contact's previous session was interrupted in
+    checkpoint = load_checkpoint(checkpoint_key)
+    if checkpoint:
+        prompt = resume_prompt(checkpoint)
+        if prompt:
+            await voice_agent_session.generate_reply(instructions=prompt)
 
 
 if __name__ == "__main__":
@@ -425,5 +507,9 @@ if __name__ == "__main__":
             entrypoint_fnc=entrypoint,
             worker_type=WorkerType.ROOM,
             agent_name="nora-voice-agent",
+            # On SIGTERM, stop taking jobs and let live sessions finish before shutdown
+            drain_timeout=int(os.environ.get("NORA_DRAIN_TIMEOUT", "300")),
+            # Must cover the task deadline, the send wait and the browser release, plus margin
+            shutdown_process_timeout=TASK_DRAIN_SECONDS + 2 * SEND_DRAIN_SECONDS + 15,
         )
     )
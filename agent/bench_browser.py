@@ -0,0 +1,60 @@
+"""
+Benchmark a browser backend against a local static site.
+Run with: python bench_browser.py <site_dir> ["task instruction"]
+
+Serves <site_dir> on localhost and times navigate, screenshot and (if an
+instruction is given) a full prompt loop. Uses NORA_BROWSER_BACKEND
+(default: local, so no network or Orgo VM is needed).
+"""
+import functools
+import http.server
+import os
+import sys
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path="../.env")
+os.environ.setdefault("NORA_BROWSER_BACKEND", "local")
+
+from browser_backend import create_browser_backend, get_chromium_pool
+
+
+def timed(label, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    print(f"{label:<12} {(time.perf_counter() - start) * 1000:8.1f} ms")
+    return result
+
+
+if len(sys.argv) < 2:
+    print(__doc__)
+    sys.exit(1)
+
+site_dir = sys.argv[1]
+instruction = sys.argv[2] if len(sys.argv) > 2 else None
+
+handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=site_dir)
+server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+url = f"http://127.0.0.1:{server.server_port}/"
+
+print(f"Benchmarking {os.environ['NORA_BROWSER_BACKEND']} backend against {url}")
+print("-" * 40)
+
+browser = timed("startup", create_browser_backend)
+try:
+    timed("navigate", browser.navigate, url)
+    for i in range(3):
+        timed(f"screenshot {i + 1}", browser.screenshot)
+    if instruction:
+        summary = timed("prompt", browser.prompt, f"On {url}: {instruction}")
+        print(f"\nResult: {summary}")
+finally:
+    browser.close()
+    if browser.name == "local":
+        get_chromium_pool().shutdown()
+    server.shutdown()
+
+print("-" * 40)
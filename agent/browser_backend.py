@@ -0,0 +1,392 @@
+"""
+Browser Backends for Nora Voice Assistant
+=========================================
+
+Defines the operations Nora's browser tools need and two implementations:
+
+- OrgoBackend: remote Orgo VM driven by Orgo's hosted computer-use agent
+- LocalChromiumBackend: local headless Chromium (Playwright) driven at the
+  DOM level, so tasks run without screenshot-based vision loops or network
+  access to a VM
+
+Select with NORA_BROWSER_BACKEND=orgo|local (default: orgo).
+"""
+
+import io
+import json
+import logging
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger("browser-backend")
+
+# Progress callback: (event_type, event_data), same shape as Orgo's prompt callback
+ProgressCallback = Callable[[str, Any], None]
+
+TASK_PREAMBLE = "IMPORTANT: Always use English. For Amazon, navigate to amazon.com (US), not regional variants."
+
+
+class BrowserBackend(ABC):
+    """
+    Interface used by NoraAgent and BrowserStream.
+
+    All methods are blocking; callers run them with asyncio.to_thread.
+    """
+
+    name = "browser"
+
+    @abstractmethod
+    def prompt(self, instruction: str, max_iterations: int = 30,
+               callback: Optional[ProgressCallback] = None) -> str:
+        """Carry out a multi-step task and return a short spoken-style summary."""
+
+    @abstractmethod
+    def screenshot(self) -> bytes:
+        """Return the current screen as PNG bytes."""
+
+    @abstractmethod
+    def navigate(self, url: str) -> None:
+        """Load `url` in the browser."""
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+# ===========================================
+# Orgo
+# ===========================================
+
+class OrgoBackend(BrowserBackend):
+    """Browser running on a remote Orgo computer."""
+
+    name = "orgo"
+
+    def __init__(self, computer, model: str = "claude-sonnet-4-5-20250929", owned: bool = False):
+        self.computer = computer
+        self.model = model
+        # Computers we created are destroyed on close; persistent ones are left running
+        self.owned = owned
+
+    @classmethod
+    def from_env(cls) -> "OrgoBackend":
+        """Connect to ORGO_COMPUTER_ID, or create a new computer."""
+        from orgo import Computer
+
+        computer_id = os.environ.get("ORGO_COMPUTER_ID")
+        api_key = os.environ.get("ORGO_API_KEY")
+
+        if not api_key:
+            logger.error("ORGO_API_KEY not set in environment")
+            raise ValueError("ORGO_API_KEY required for browser control")
+
+        if computer_id:
+            # Explicitly pass api_key to ensure SDK uses correct credentials
+            computer = Computer(computer_id=computer_id, api_key=api_key)
+            logger.info(f"Connected to existing Orgo Computer: {computer_id}")
+        else:
+            computer = Computer(api_key=api_key)
+            logger.info("Created new Orgo Computer")
+        logger.info(f"Orgo Computer URL: {computer.url}")
+        return cls(computer, owned=not computer_id)
+
+    def prompt(self, instruction: str, max_iterations: int = 30,
+               callback: Optional[ProgressCallback] = None) -> str:
+        result = self.computer.prompt(
+            instruction=f"{TASK_PREAMBLE}\n\nTASK: {instruction}",
+            model=self.model,
+            max_iterations=max_iterations,
+            verbose=False,  # Console output would block the worker thread
+            callback=callback,
+        )
+        return self._summarize(result)
+
+    def screenshot(self) -> bytes:
+        image = self.computer.screenshot()
+        if isinstance(image, (bytes, bytearray)):
+            return bytes(image)
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def navigate(self, url: str) -> None:
+        # Orgo exposes keyboard/mouse only: focus the address bar and type the URL
+        self.computer.key("ctrl+l")
+        self.computer.type(url)
+        self.computer.key("Enter")
+
+    def close(self) -> None:
+        if self.owned:
+            self.computer.destroy()
+            self.owned = False
+            logger.info("Orgo Computer destroyed")
+
+    @staticmethod
+    def _summarize(result) -> str:
+        """Reduce Orgo's message list to the last assistant text."""
+        if isinstance(result, str):
+            return result[:500]
+        if isinstance(result, list):
+            for msg in reversed(result):
+                if isinstance(msg, dict) and msg.get("role") == "assistant":
+                    for item in msg.get("content", []):
+                        if isinstance(item, dict) and item.get("type") == "text":
+                            return item.get("text", "Task completed.")[:500]
+                    break
+            return "Task completed."
+        return f"Browser task completed: {str(result)[:200]}"
+
+
+# ===========================================
+# Local headless Chromium
+# ===========================================
+
+class ChromiumPool:
+    """
+    One headless Chromium shared by all local backends in this process.
+
+    Playwright's sync API is bound to the thread that started it, so every
+    Playwright call is marshalled onto a single dedicated worker thread.
+    Callers submit short individual steps (never whole tasks or model
+    calls), so leased pages interleave instead of queueing behind each
+    other. Each lease is an isolated browser context with one page.
+    """
+
+    def __init__(self, max_contexts: int = 4, headless: bool = True, lease_timeout: float = 30.0):
+        self.max_contexts = max_contexts
+        self.headless = headless
+        self.lease_timeout = lease_timeout
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chromium")
+        self._slots = threading.BoundedSemaphore(max_contexts)
+        self._playwright = None
+        self._browser = None
+
+    def run(self, fn: Callable, *args, **kwargs):
+        """Run `fn` on the Playwright thread and wait for the result."""
+        return self._executor.submit(fn, *args, **kwargs).result()
+
+    def lease(self, width: int, height: int):
+        """Open a fresh page; waits up to lease_timeout while all contexts are in use."""
+        if not self._slots.acquire(timeout=self.lease_timeout):
+            raise TimeoutError(f"All {self.max_contexts} Chromium contexts in use after {self.lease_timeout:.0f}s")
+        try:
+            return self.run(self._new_page, width, height)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, page) -> None:
+        """Close a leased page's context and free its slot."""
+        try:
+            self.run(page.context.close)
+        finally:
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        """Close Chromium and stop the worker thread."""
+        def stop():
+            if self._browser:
+                self._browser.close()
+            if self._playwright:
+                self._playwright.stop()
+            self._browser = self._playwright = None
+        self.run(stop)
+        self._executor.shutdown(wait=True)
+
+    def _new_page(self, width: int, height: int):
+        if self._browser is None:
+            from playwright.sync_api import sync_playwright
+
+            self._playwright = sync_playwright().start()
+            self._browser = self._playwright.chromium.launch(headless=self.headless)
+            logger.info("Local Chromium started")
+        context = self._browser.new_context(viewport={"width": width, "height": height})
+        return context.new_page()
+
+
+_pool: Optional[ChromiumPool] = None
+
+
+def get_chromium_pool() -> ChromiumPool:
+    """Get the singleton ChromiumPool instance."""
+    global _pool
+    if _pool is None:
+        _pool = ChromiumPool(max_contexts=int(os.environ.get("NORA_CHROMIUM_POOL_SIZE", "4")))
+    return _pool
+
+
+# Collects the visible interactive elements and tags them with an index
+_SNAPSHOT_JS = """
+() => {
+  const selector = 'a[href], button, input, textarea, select, [role=button], [role=link], [onclick]';
+  const items = [];
+  // Clear tags from earlier snapshots so each index matches exactly one element
+  document.querySelectorAll('[data-nora-id]').forEach((el) => el.removeAttribute('data-nora-id'));
+  document.querySelectorAll(selector).forEach((el) => {
+    const rect = el.getBoundingClientRect();
+    if (rect.width === 0 || rect.height === 0 || items.length >= 150) return;
+    el.setAttribute('data-nora-id', String(items.length));
+    const label = (el.innerText || el.value || el.getAttribute('aria-label') ||
+                   el.getAttribute('placeholder') || el.getAttribute('title') || '').trim();
+    items.push(`[${items.length}] <${el.tagName.toLowerCase()}${el.type ? ' type=' + el.type : ''}> ${label.slice(0, 80)}`);
+  });
+  return {
+    url: location.href,
+    title: document.title,
+    text: document.body ? document.body.innerText.slice(0, 3000) : '',
+    elements: items.join('\\n'),
+  };
+}
+"""
+
+_DOM_AGENT_PROMPT = """You control a web browser through its DOM. Each turn you see the page URL, title,
+visible text and a numbered list of interactive elements. Reply with ONE JSON object:
+{"action": "navigate", "url": "..."}
+{"action": "click", "element": <number>}
+{"action": "type", "element": <number>, "text": "...", "submit": true|false}
+{"action": "done", "summary": "<one or two sentences for the user>"}
+Do not check out or pay without the user's permission."""
+
+_DIRECT_NAVIGATION = re.compile(r"^\s*(?:go to|open|navigate to|visit)\s+(\S+?)\.?\s*$", re.IGNORECASE)
+
+
+class LocalChromiumBackend(BrowserBackend):
+    """
+    Browser running in a local headless Chromium.
+
+    Tasks are driven by a text-only model over DOM snapshots; a bare
+    "go to <site>" instruction is handled without any model call.
+    """
+
+    name = "local"
+
+    def __init__(self, pool: Optional[ChromiumPool] = None, model: str = "gpt-4o-mini",
+                 width: int = 1280, height: int = 720):
+        self.pool = pool or get_chromium_pool()
+        self.model = model
+        self.page = self.pool.lease(width, height)
+        self._client = None
+        # While a task runs, screenshots are served from the frame taken after each step
+        self._last_frame: Optional[bytes] = None
+        self._busy = False
+
+    def prompt(self, instruction: str, max_iterations: int = 30,
+               callback: Optional[ProgressCallback] = None) -> str:
+        self._busy = True
+        try:
+            return self._run_task(instruction, max_iterations, callback)
+        finally:
+            self._busy = False
+
+    def screenshot(self) -> bytes:
+        if self._busy and self._last_frame is not None:
+            return self._last_frame
+        self._last_frame = self.pool.run(self.page.screenshot, type="png")
+        return self._last_frame
+
+    def navigate(self, url: str) -> None:
+        self.pool.run(self._goto, url)
+
+    def close(self) -> None:
+        if self.page is not None:
+            self.pool.release(self.page)
+            self.page = None
+
+    def _goto(self, url: str) -> None:
+        # Runs on the Playwright thread
+        if not re.match(r"^[a-z]+://", url):
+            url = f"https://{url}"
+        self.page.goto(url, wait_until="domcontentloaded")
+
+    def _run_task(self, instruction: str, max_iterations: int,
+                  callback: Optional[ProgressCallback]) -> str:
+        # Runs on the caller's thread; only the individual page steps go to the
+        # Playwright thread, so the model calls don't hold it
+        direct = _DIRECT_NAVIGATION.match(instruction)
+        if direct and "." in direct.group(1):
+            self.pool.run(self._goto, direct.group(1))
+            self.pool.run(self._capture)
+            title = self.pool.run(self.page.title)
+            return f"I opened {title or direct.group(1)}."
+
+        messages = [
+            {"role": "system", "content": _DOM_AGENT_PROMPT},
+            {"role": "user", "content": f"{TASK_PREAMBLE}\n\nTASK: {instruction}"},
+        ]
+        # Only the latest snapshot is sent; earlier steps are kept as one line each
+        # so each model call stays the same size however long the task runs
+        history: list[str] = []
+        for _ in range(max_iterations):
+            snapshot = self.pool.run(self.page.evaluate, _SNAPSHOT_JS)
+            page = (
+                f"URL: {snapshot['url']}\nTITLE: {snapshot['title']}\n"
+                f"TEXT:\n{snapshot['text']}\n\nELEMENTS:\n{snapshot['elements']}"
+            )
+            if history:
+                page = "PREVIOUS STEPS:\n" + "\n".join(history) + "\n\n" + page
+            action = self._next_action(messages + [{"role": "user", "content": page}])
+            if callback:
+                callback("tool_use", action)
+
+            if action.get("action") == "done":
+                summary = action.get("summary")
+                if isinstance(summary, str) and summary.strip():
+                    return summary[:500]
+                return "Task completed."
+            step = f"{snapshot['url']}: {json.dumps(action)}"
+            try:
+                self.pool.run(self._perform, action)
+            except Exception as e:
+                step += f" -> failed: {e}"
+            history.append(step)
+            self.pool.run(self._capture)
+
+        return "I ran out of steps before finishing that task."
+
+    def _next_action(self, messages: list[dict]) -> dict:
+        if self._client is None:
+            from openai import OpenAI
+
+            self._client = OpenAI()
+        response = self._client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            response_format={"type": "json_object"},
+        )
+        return json.loads(response.choices[0].message.content)
+
+    def _perform(self, action: dict) -> None:
+        # Runs on the Playwright thread
+        kind = action.get("action")
+        if kind == "navigate":
+            self._goto(action["url"])
+            return
+
+        element = self.page.locator(f"[data-nora-id='{int(action['element'])}']")
+        if kind == "click":
+            element.click(timeout=5000)
+            self.page.wait_for_load_state("domcontentloaded")
+        elif kind == "type":
+            element.fill(action.get("text", ""), timeout=5000)
+            if action.get("submit"):
+                element.press("Enter")
+                self.page.wait_for_load_state("domcontentloaded")
+        else:
+            raise ValueError(f"Unknown action: {kind}")
+
+    def _capture(self) -> None:
+        # Runs on the Playwright thread
+        self._last_frame = self.page.screenshot(type="png")
+
+
+def create_browser_backend() -> BrowserBackend:
+    """Create the backend selected by NORA_BROWSER_BACKEND."""
+    kind = os.environ.get("NORA_BROWSER_BACKEND", "orgo").lower()
+    if kind == "local":
+        return LocalChromiumBackend()
+    if kind == "orgo":
+        return OrgoBackend.from_env()
+    raise ValueError(f"Unknown NORA_BROWSER_BACKEND: {kind}")
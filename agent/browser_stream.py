@@ -0,0 +1,184 @@
+"""
+Browser Stream for Nora Voice Assistant
+=======================================
+
+Publishes the browser backend's screen into the LiveKit room as a video track.
+
+Replaces the per-viewer VNC session: the agent captures the screen once and
+every participant in the room subscribes to the same track, so no remote
+desktop credentials ever leave the agent.
+
+- Adaptive frame rate: captures while a browser task is running; when idle the
+  remote screen is not polled and the last frame is only re-sent locally
+- Dirty-region detection: frames whose tiles are all unchanged are not sent
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import time
+from typing import Optional
+
+from livekit import rtc
+from PIL import Image
+
+from browser_backend import BrowserBackend
+
+logger = logging.getLogger("browser-stream")
+
+TRACK_NAME = "nora-browser"
+
+
+class BrowserStream:
+    """
+    Shared screen capture loop for one room.
+
+    Provides:
+    - start(): Publish the track and begin capturing
+    - set_active(): Switch between active and idle frame rates
+    - refresh(): Capture a frame now (e.g. after a navigation)
+    - stop(): Stop capturing and unpublish the track
+    """
+
+    def __init__(
+        self,
+        browser: BrowserBackend,
+        room: rtc.Room,
+        width: int = 1280,
+        height: int = 720,
+        active_fps: float = 4.0,
+        tile_size: int = 64,
+        keyframe_interval: float = 10.0,
+    ):
+        self.browser = browser
+        self.room = room
+        self.width = width
+        self.height = height
+        self.active_fps = active_fps
+        self.tile_size = tile_size
+        # Unchanged frames are still resent this often so late joiners get a picture
+        self.keyframe_interval = keyframe_interval
+
+        self._source: Optional[rtc.VideoSource] = None
+        self._track: Optional[rtc.LocalVideoTrack] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._active = False
+        # One capture is owed: at start, after a task ends, or after a navigation
+        self._refresh_pending = True
+        self._frame_bytes: Optional[bytes] = None
+        self._tile_hashes: list[bytes] = []
+        self._last_sent = 0.0
+
+    async def start(self) -> None:
+        """Publish the browser track and start the capture loop."""
+        if self._task:
+            logger.warning("Browser stream already running")
+            return
+
+        self._source = rtc.VideoSource(self.width, self.height)
+        self._track = rtc.LocalVideoTrack.create_video_track(TRACK_NAME, self._source)
+        options = rtc.TrackPublishOptions(
+            source=rtc.TrackSource.SOURCE_SCREENSHARE,
+            video_encoding=rtc.VideoEncoding(
+                max_framerate=self.active_fps,
+                max_bitrate=1_500_000,
+            ),
+        )
+        await self.room.local_participant.publish_track(self._track, options)
+        logger.info(f"Browser track published ({self.width}x{self.height})")
+
+        self._task = asyncio.create_task(self._capture_loop())
+
+    def set_active(self, active: bool) -> None:
+        """Start or stop capturing; a final frame is taken when a task ends."""
+        self._active = active
+        self._refresh_pending = True
+        self._wake.set()
+
+    def refresh(self) -> None:
+        """Capture a frame immediately instead of waiting for the next tick."""
+        self._refresh_pending = True
+        self._wake.set()
+
+    async def stop(self) -> None:
+        """Stop capturing and unpublish the browser track."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._track:
+            try:
+                await self.room.local_participant.unpublish_track(self._track.sid)
+            except Exception as e:
+                logger.warning(f"Failed to unpublish browser track: {e}")
+            self._track = None
+        self._source = None
+        logger.info("Browser stream stopped")
+
+    async def _capture_loop(self) -> None:
+        while True:
+            started = time.monotonic()
+            self._wake.clear()
+            try:
+                if self._active or self._refresh_pending:
+                    self._refresh_pending = False
+                    await self._capture_once()
+                elif self._frame_bytes and started - self._last_sent >= self.keyframe_interval:
+                    # Idle: re-send the cached frame for late joiners without touching the remote screen
+                    self._send(self._frame_bytes)
+            except Exception as e:
+                logger.warning("Browser capture failed: %s", e)
+
+            interval = 1.0 / self.active_fps if self._active else self.keyframe_interval
+            delay = max(0.0, interval - (time.monotonic() - started))
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _capture_once(self) -> None:
+        # Screenshot, decode, tile hashing and frame conversion all stay off the event loop
+        frame_bytes, hashes = await asyncio.to_thread(self._grab_and_hash)
+
+        dirty = sum(1 for old, new in zip(self._tile_hashes, hashes) if old != new)
+        if len(hashes) != len(self._tile_hashes):
+            dirty = len(hashes)
+        self._tile_hashes = hashes
+
+        if dirty == 0 and time.monotonic() - self._last_sent < self.keyframe_interval:
+            return
+
+        self._frame_bytes = frame_bytes
+        self._send(frame_bytes)
+        logger.debug("Browser frame sent (%d/%d tiles changed)", dirty, len(hashes))
+
+    def _send(self, frame_bytes: bytes) -> None:
+        frame = rtc.VideoFrame(self.width, self.height, rtc.VideoBufferType.RGBA, frame_bytes)
+        self._source.capture_frame(frame)
+        self._last_sent = time.monotonic()
+
+    def _grab_and_hash(self) -> tuple[bytes, list[bytes]]:
+        image = self._grab()
+        return image.tobytes(), self._hash_tiles(image)
+
+    def _grab(self) -> Image.Image:
+        """Take a screenshot and normalise it to an RGBA frame of the track size."""
+        image = Image.open(io.BytesIO(self.browser.screenshot())).convert("RGBA")
+        if image.size != (self.width, self.height):
+            image = image.resize((self.width, self.height), Image.BILINEAR)
+        return image
+
+    def _hash_tiles(self, image: Image.Image) -> list[bytes]:
+        """Digest each tile of the frame so unchanged regions can be detected cheaply."""
+        hashes = []
+        for top in range(0, self.height, self.tile_size):
+            for left in range(0, self.width, self.tile_size):
+                tile = image.crop((left, top, left + self.tile_size, top + self.tile_size))
+                hashes.append(hashlib.blake2b(tile.tobytes(), digest_size=8).digest())
+        return hashes
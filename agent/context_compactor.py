@@ -0,0 +1,211 @@
+"""
+Context Compaction for Nora Voice Assistant
+===========================================
+
+Keeps the realtime session's chat context under a token budget so that
+per-turn latency and cost stay flat over hours-long sessions.
+
+- Tracks context size from the realtime model's reported input tokens
+- Evicts bulky tool outputs (screenshots, long browser results) once answered
+- Summarizes older turns into a single memory message in the background
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from livekit.agents import Agent, AgentSession, ChatContext, MetricsCollectedEvent, utils
+from livekit.agents.metrics import RealtimeModelMetrics
+from livekit.plugins import openai
+
+from observability import get_tracer
+
+logger = logging.getLogger("context-compactor")
+tracer = get_tracer()
+
+SUMMARY_PROMPT = """You maintain the long-term memory of Nora, a voice assistant helping an elderly user named Rana.
+Merge the existing memory and the new conversation excerpt into one short memory note.
+Keep facts about Rana, her family and contacts, preferences, open requests, tasks in progress and their outcomes, and anything Nora promised to do.
+Drop small talk, greetings and exact wording. Write plain sentences, at most 150 words."""
+
+
+def _estimate_tokens(text: str) -> int:
+    # Rough heuristic (~4 characters per token) used until the model reports usage
+    return len(text) // 4 + 1
+
+
+class ContextCompactor:
+    """
+    Rolling context manager for an AgentSession.
+
+    Provides:
+    - attach(): Subscribe to session events
+    - compact(): Run one eviction/summarization pass (normally triggered automatically)
+    """
+
+    def __init__(
+        self,
+        agent: Agent,
+        token_budget: int = 12000,
+        keep_recent_items: int = 8,
+        tool_output_max_chars: int = 400,
+        summary_model: str = "gpt-4o-mini",
+    ):
+        self.agent = agent
+        self.token_budget = token_budget
+        self.keep_recent_items = keep_recent_items
+        self.tool_output_max_chars = tool_output_max_chars
+        self._llm = openai.LLM(model=summary_model)
+
+        self.memory: str = ""
+        # Each summary gets a new id so update_chat_ctx replaces the old memory item
+        self.memory_item_id: Optional[str] = None
+        self.context_tokens: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def attach(self, session: AgentSession) -> None:
+        """Track token usage and compact after each assistant reply."""
+
+        @session.on("metrics_collected")
+        def on_metrics_collected(ev: MetricsCollectedEvent):
+            if isinstance(ev.metrics, RealtimeModelMetrics):
+                self.context_tokens = ev.metrics.input_tokens
+
+        @session.on("conversation_item_added")
+        def on_conversation_item_added(ev):
+            if ev.item.role == "assistant":
+                self._schedule()
+
+    def _schedule(self) -> None:
+        # One pass at a time; compaction never blocks the conversation
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self.compact())
+
+    async def compact(self) -> None:
+        """Evict answered tool outputs, then summarize old turns if over budget."""
+        try:
+            with tracer.span("context.compact") as span:
+                evicted = await self._evict_tool_outputs()
+                tokens = self._context_size()
+                span.set(evicted=evicted, tokens=tokens, budget=self.token_budget)
+                if tokens > self.token_budget:
+                    summarized = await self._summarize_old_turns()
+                    span.set(summarized=summarized)
+                    # Reported usage is stale until the next response
+                    self.context_tokens = None
+        except Exception as e:
+            logger.warning("Context compaction failed: %s", e)
+
+    def _context_size(self) -> int:
+        if self.context_tokens is not None:
+            return self.context_tokens
+        return sum(_estimate_tokens(self._item_text(item)) for item in self.agent.chat_ctx.items)
+
+    async def _evict_tool_outputs(self) -> int:
+        """Shrink tool outputs that precede the latest assistant message."""
+        chat_ctx = self.agent.chat_ctx.copy()
+        items = chat_ctx.items
+
+        last_reply = max(
+            (i for i, item in enumerate(items) if item.type == "message" and item.role == "assistant"),
+            default=-1,
+        )
+        evicted = 0
+        for i in range(last_reply):
+            item = items[i]
+            if item.type != "function_call_output" or len(item.output) <= self.tool_output_max_chars:
+                continue
+            if item.output.startswith("data:"):
+                placeholder = "[image omitted after use]"
+            else:
+                placeholder = item.output[: self.tool_output_max_chars] + " [truncated]"
+            # update_chat_ctx diffs by item id: a fresh id makes the realtime
+            # session delete the bulky item and create the shortened one
+            items[i] = item.model_copy(update={"output": placeholder, "id": utils.shortuuid("item_")})
+            evicted += 1
+
+        if evicted:
+            await self.agent.update_chat_ctx(chat_ctx)
+            # The reported usage still counts the evicted outputs; re-estimate until the next response
+            self.context_tokens = None
+            logger.debug("Evicted %d bulky tool output(s)", evicted)
+        return evicted
+
+    async def _summarize_old_turns(self) -> int:
+        """Fold everything but the most recent items into the memory message."""
+        snapshot = [
+            item for item in self.agent.chat_ctx.items
+            if item.id != self.memory_item_id and not (item.type == "message" and item.role == "system")
+        ]
+        cut = max(0, len(snapshot) - self.keep_recent_items)
+        # Never separate a tool call from its output
+        while cut < len(snapshot) and snapshot[cut].type == "function_call_output":
+            cut += 1
+        old = snapshot[:cut]
+        if not old:
+            return 0
+
+        transcript = "\n".join(
+            f"{self._item_label(item)}: {self._item_text(item)}" for item in old
+        )
+        summary_ctx = ChatContext()
+        summary_ctx.add_message(role="system", content=SUMMARY_PROMPT)
+        summary_ctx.add_message(
+            role="user",
+            content=f"EXISTING MEMORY:\n{self.memory or '(none)'}\n\nCONVERSATION EXCERPT:\n{transcript}",
+        )
+
+        parts = []
+        async with self._llm.chat(chat_ctx=summary_ctx) as stream:
+            async for chunk in stream:
+                if chunk.delta and chunk.delta.content:
+                    parts.append(chunk.delta.content)
+        summary = "".join(parts).strip()
+        if not summary:
+            return 0
+
+        # Re-read the context: items added while summarizing must be kept
+        old_ids = {item.id for item in old} | {self.memory_item_id}
+        chat_ctx = self.agent.chat_ctx.copy()
+        kept = [item for item in chat_ctx.items if item.id not in old_ids]
+
+        memory_item_id = utils.shortuuid("nora_memory_")
+        chat_ctx.items.clear()
+        chat_ctx.add_message(
+            role="assistant",
+            content=f"(Memory of earlier conversation) {summary}",
+            id=memory_item_id,
+        )
+        memory_item = chat_ctx.items.pop()
+        # Memory goes after any leading system messages, ahead of the live turns
+        insert_at = next(
+            (i for i, item in enumerate(kept) if not (item.type == "message" and item.role == "system")),
+            len(kept),
+        )
+        chat_ctx.items.extend(kept[:insert_at] + [memory_item] + kept[insert_at:])
+        await self.agent.update_chat_ctx(chat_ctx)
+
+        self.memory = summary
+        self.memory_item_id = memory_item_id
+        logger.info("Summarized %d context item(s) into memory", len(old), extra={"memory_chars": len(summary)})
+        return len(old)
+
+    @staticmethod
+    def _item_label(item) -> str:
+        if item.type == "message":
+            return item.role
+        if item.type == "function_call":
+            return f"tool call {item.name}"
+        return "tool result"
+
+    def _item_text(self, item) -> str:
+        if item.type == "message":
+            return item.text_content or ""
+        if item.type == "function_call":
+            return item.arguments
+        if item.type == "function_call_output":
+            if item.output.startswith("data:"):
+                return "[image]"
+            return item.output[: self.tool_output_max_chars]
+        return ""
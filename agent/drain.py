@@ -0,0 +1,214 @@
+"""
+Graceful Drain for Nora Voice Assistant
+=======================================
+
+Shuts a job down without losing in-flight work, so workers can be rolled
+or scaled down under live load.
+
+The LiveKit worker stops accepting new jobs when it receives SIGTERM/SIGINT
+and waits up to its drain timeout; remaining jobs are then shut down and
+run DrainCoordinator.drain() as a shutdown callback:
+
+1. Refuse new browser tasks
+2. Let an in-flight browser task finish, or checkpoint it after a deadline
+3. Stop the Telegram listener, confirm polled updates and wait for outbound sends
+4. Persist a checkpoint that the contact's next session resumes from
+5. Release the browser backend and stop the browser stream
+
+Once the listener stops, the updates it polled are confirmed to Telegram so
+they are not delivered again. Messages that were never polled stay
+unacknowledged and Telegram delivers them to the next session. Only messages
+already received but not yet announced (queued while browsing) go into the
+checkpoint.
+
+Checkpoints are keyed by the Telegram contact, not the room (every session
+gets a new room), and expire after NORA_CHECKPOINT_TTL seconds. Point
+NORA_CHECKPOINT_DIR at storage shared by all workers (e.g. a mounted
+volume) so a job on another worker can pick them up after a deploy.
+
+Progress is logged and published to the room as `agent_draining` messages.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+from observability import get_tracer
+
+logger = logging.getLogger("nora-drain")
+tracer = get_tracer()
+
+CHECKPOINT_DIR = os.environ.get("NORA_CHECKPOINT_DIR", "checkpoints")
+CHECKPOINT_TTL = float(os.environ.get("NORA_CHECKPOINT_TTL", "86400"))
+
+
+def _checkpoint_path(key: str) -> str:
+    safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(key))
+    return os.path.join(CHECKPOINT_DIR, f"{safe_name}.json")
+
+
+def _read_checkpoint(path: str) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def load_checkpoint(key: str) -> Optional[dict]:
+    """Read and remove the checkpoint left by a previous session for this contact."""
+    path = _checkpoint_path(key)
+    try:
+        checkpoint = _read_checkpoint(path)
+        if checkpoint is None:
+            return None
+        os.remove(path)
+    except (OSError, ValueError) as e:
+        logger.warning("Failed to load checkpoint %s: %s", path, e)
+        return None
+
+    age = time.time() - checkpoint.get("created_at", 0)
+    if age > CHECKPOINT_TTL:
+        logger.info("Discarding checkpoint %s (%.0fs old)", path, age)
+        return None
+    logger.info("Loaded checkpoint %s", path)
+    return checkpoint
+
+
+def resume_prompt(checkpoint: dict) -> Optional[str]:
+    """Build the instruction that tells Nora what was interrupted by the restart."""
+    parts = []
+    if checkpoint.get("browser_task"):
+        parts.append(
+            "Your previous session ended while you were working on this browser task: "
+            f"\"{checkpoint['browser_task']}\". It may not have finished. "
+            "Briefly tell Rana and offer to check or try it again."
+        )
+    messages = checkpoint.get("queued_messages") or []
+    if messages:
+        texts = " | ".join(f"From {m['from_name']}: {m['text']}" for m in messages)
+        parts.append(f"Also read these {len(messages)} unread message(s) aloud: {texts}")
+    return " ".join(parts) or None
+
+
+class DrainCoordinator:
+    """
+    Drains one job's in-flight work within a deadline.
+
+    Provides:
+    - drain(): Run the drain sequence (registered as a job shutdown callback)
+    """
+
+    def __init__(self, agent, room, checkpoint_key: str, telegram_service=None, browser_stream=None,
+                 task_deadline: float = 45.0, send_deadline: float = 10.0):
+        self.agent = agent
+        self.room = room
+        self.checkpoint_key = checkpoint_key
+        self.telegram = telegram_service
+        self.browser_stream = browser_stream
+        self.task_deadline = task_deadline
+        self.send_deadline = send_deadline
+        self._started = 0.0
+
+    async def drain(self) -> None:
+        """Drain the job; each stage is best-effort so later stages always run."""
+        self._started = time.monotonic()
+        with tracer.span("drain") as span:
+            self.agent.draining = True
+            await self._report("started")
+
+            task = await self._finish_browser_task()
+            span.set(browser_task=task)
+
+            queued = await self._flush_telegram()
+            span.set(queued_messages=len(queued))
+
+            if task == "checkpointed" or queued:
+                try:
+                    await asyncio.to_thread(self._write_checkpoint, queued)
+                    await self._report("checkpointed")
+                except OSError as e:
+                    logger.error("Failed to write checkpoint: %s", e)
+
+            await self._release_browser()
+            await self._report("completed")
+
+    async def _finish_browser_task(self) -> str:
+        if not self.agent.browser_busy:
+            return "idle"
+        await self._report("waiting_for_browser_task")
+        try:
+            await asyncio.wait_for(self.agent.browser_idle.wait(), timeout=self.task_deadline)
+            logger.info("In-flight browser task finished during drain")
+            return "finished"
+        except asyncio.TimeoutError:
+            logger.warning("Browser task still running after %.0fs; checkpointing", self.task_deadline)
+            return "checkpointed"
+
+    async def _flush_telegram(self) -> list[dict]:
+        if self.telegram:
+            await self._report("flushing_telegram")
+            try:
+                # Stop polling, then confirm what was polled: Telegram only drops an
+                # update once a later getUpdates passes a higher offset. Anything not
+                # yet polled stays unacknowledged and goes to the next session.
+                await asyncio.to_thread(self.telegram.stop_listener)
+                if not await asyncio.to_thread(self.telegram.confirm_updates):
+                    logger.warning("Polled Telegram updates may be delivered again to the next session")
+                if not await asyncio.to_thread(self.telegram.wait_for_sends, self.send_deadline):
+                    logger.warning("Outbound Telegram sends still in flight after %.0fs", self.send_deadline)
+            except Exception as e:
+                logger.error("Failed to flush Telegram: %s", e)
+
+        # Received and confirmed but never announced: only the checkpoint has them now
+        queued = list(self.agent.queued_messages)
+        self.agent.queued_messages.clear()
+        return queued
+
+    async def _release_browser(self) -> None:
+        await self._report("releasing_browser")
+        if self.browser_stream:
+            try:
+                await self.browser_stream.stop()
+            except Exception as e:
+                logger.warning("Failed to stop browser stream: %s", e)
+        if self.agent.browser:
+            try:
+                # A checkpointed task may still hold the browser; don't wait on it forever
+                await asyncio.wait_for(asyncio.to_thread(self.agent.browser.close), timeout=self.send_deadline)
+            except Exception as e:
+                logger.warning("Failed to release browser backend: %s", e)
+
+    def _write_checkpoint(self, queued: list[dict]) -> None:
+        path = _checkpoint_path(self.checkpoint_key)
+        # Keep messages from an earlier checkpoint that no session has picked up yet
+        try:
+            previous = _read_checkpoint(path) or {}
+        except (OSError, ValueError):
+            previous = {}
+
+        checkpoint = {
+            "room": self.room.name,
+            "created_at": time.time(),
+            "browser_task": self.agent.current_task if self.agent.browser_busy else None,
+            "queued_messages": (previous.get("queued_messages") or []) + queued,
+        }
+        os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, path)
+        logger.info("Checkpoint written to %s", path)
+
+    async def _report(self, stage: str) -> None:
+        elapsed = time.monotonic() - self._started
+        logger.info("Drain %s (%.1fs)", stage, elapsed, extra={"drain_stage": stage})
+        try:
+            data = json.dumps({"type": "agent_draining", "stage": stage})
+            await self.room.local_participant.publish_data(data.encode(), reliable=True)
+        except Exception:
+            # The room may already be disconnected; the log line is the record
+            pass
@@ -0,0 +1,336 @@
+"""
+Observability for Nora Voice Assistant
+======================================
+
+Non-blocking structured logging and per-request trace spans.
+
+Logging:
+- Callers only enqueue records; a background listener thread formats and writes them
+- Records are emitted as JSON lines carrying the active trace/span IDs
+- DEBUG/INFO records can be sampled; WARNING and above are always kept
+
+Tracing:
+- A trace follows one user request (voice turn, tool call, Orgo iterations,
+  data-channel publish, Telegram send)
+- Finished spans go into an in-memory ring buffer that can be dumped on demand
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Iterator, Optional
+
+# Attributes present on every LogRecord; anything else was passed via `extra`
+_STANDARD_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+# ===========================================
+# Tracing
+# ===========================================
+
+@dataclass
+class Span:
+    """One timed operation within a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_time: float = 0.0
+    duration_ms: Optional[float] = None
+    status: str = "ok"
+    attributes: dict = field(default_factory=dict)
+    events: list = field(default_factory=list)
+    _started: float = field(default=0.0, repr=False)
+
+    def set(self, **attributes) -> None:
+        """Attach attributes to the span."""
+        self.attributes.update(attributes)
+
+    @property
+    def ended(self) -> bool:
+        return self.duration_ms is not None
+
+    def end(self) -> None:
+        """Fix the span's duration; later calls are ignored."""
+        if self.duration_ms is None:
+            self.duration_ms = round((time.perf_counter() - self._started) * 1000, 2)
+
+    def add_event(self, name: str, **attributes) -> None:
+        """Record a point-in-time event, timestamped relative to the span start."""
+        offset_ms = (time.perf_counter() - self._started) * 1000
+        self.events.append({"name": name, "offset_ms": round(offset_ms, 2), **attributes})
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data.pop("_started")
+        return data
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("nora_span", default=None)
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class Tracer:
+    """
+    Span recorder backed by a fixed-size ring buffer.
+
+    Provides:
+    - start_trace() / end_trace(): Open and close the root span of one request
+    - activate(): Make a trace current for the enclosed block (and tasks it starts)
+    - active_span(): The span current in this context
+    - span(): Context manager timing an operation within the current trace
+    - dump(): Return finished spans, optionally for a single trace
+    - dump_to_file(): Write finished spans as JSON lines
+    """
+
+    def __init__(self, capacity: int = 2048):
+        self._spans: deque[Span] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def start_trace(self, name: str, **attributes) -> Span:
+        """
+        Open the root span of a new trace.
+
+        The root stays open until end_trace(), so its duration is the
+        end-to-end time of the request.
+        """
+        trace_id = _new_id()
+        return Span(
+            name=name,
+            trace_id=trace_id,
+            span_id=trace_id,
+            start_time=time.time(),
+            attributes=attributes,
+            _started=time.perf_counter(),
+        )
+
+    def end_trace(self, root: Span, **attributes) -> None:
+        """Close a root span and record it. Safe to call more than once."""
+        if root.ended:
+            return
+        root.set(**attributes)
+        root.end()
+        self._record(root)
+
+    @contextmanager
+    def activate(self, root: Optional[Span]) -> Iterator[None]:
+        """
+        Run the enclosed block inside `root`'s trace.
+
+        Context variables are copied into tasks and to_thread calls when they
+        are created, so work started here stays on this trace even if another
+        request begins meanwhile.
+        """
+        if root is None:
+            yield
+            return
+        token = _current_span.set(root)
+        try:
+            yield
+        finally:
+            _current_span.reset(token)
+
+    def active_span(self) -> Optional[Span]:
+        """Return the span current in this context, if any."""
+        return _current_span.get()
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """Time the enclosed block as a child of the active span; starts a trace if none."""
+        parent = _current_span.get()
+        trace_id = parent.trace_id if parent else _new_id()
+
+        span = Span(
+            name=name,
+            trace_id=trace_id,
+            span_id=_new_id() if parent else trace_id,
+            parent_id=parent.span_id if parent else None,
+            start_time=time.time(),
+            attributes=attributes,
+            _started=time.perf_counter(),
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = f"error: {type(e).__name__}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            self._record(span)
+
+    def dump(self, trace_id: Optional[str] = None) -> list[dict]:
+        """Return finished spans, oldest first."""
+        with self._lock:
+            spans = list(self._spans)
+        return [s.to_dict() for s in spans if trace_id is None or s.trace_id == trace_id]
+
+    def dump_to_file(self, path: str, trace_id: Optional[str] = None) -> int:
+        """Write finished spans to `path` as JSON lines. Returns the span count."""
+        spans = self.dump(trace_id)
+        with open(path, "w") as f:
+            for span in spans:
+                f.write(json.dumps(span, default=str) + "\n")
+        return len(spans)
+
+    def _record(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+
+# Singleton instance for easy import
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Get the singleton Tracer instance."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+# ===========================================
+# Logging
+# ===========================================
+
+class _ContextFilter(logging.Filter):
+    """Stamp records with the caller's trace/span IDs before they cross threads."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        span = _current_span.get()
+        record.trace_id = span.trace_id if span else None
+        record.span_id = span.span_id if span else None
+        return True
+
+
+class _SamplingFilter(logging.Filter):
+    """Keep a fraction of records per level; unlisted levels are always kept."""
+
+    def __init__(self, rates: dict[int, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args now (they may be mutated later), but leave formatting
+        # and serialisation to the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_RECORD_ATTRS and value is not None:
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(
+    level: int = logging.INFO,
+    sample_rates: Optional[dict[int, float]] = None,
+    queue_size: int = 10000,
+) -> None:
+    """
+    Route all logging through a background thread.
+
+    Handlers already on the root logger (e.g. those installed by the LiveKit
+    CLI or job process) are moved behind the queue and keep their own
+    formatting, so every record is written exactly once and never on the
+    calling thread. Call this after the framework has configured logging;
+    if no handlers exist yet, a JSON stream handler is used.
+
+    Safe to call more than once; only the first call installs the pipeline.
+
+    Args:
+        level: Root log level
+        sample_rates: Fraction of records to keep per level,
+                      e.g. {logging.DEBUG: 0.1}. Defaults to LOG_SAMPLE_DEBUG /
+                      LOG_SAMPLE_INFO environment variables, else keep all.
+        queue_size: Records buffered before new ones are dropped
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    if sample_rates is None:
+        sample_rates = {
+            logging.DEBUG: float(os.environ.get("LOG_SAMPLE_DEBUG", "1.0")),
+            logging.INFO: float(os.environ.get("LOG_SAMPLE_INFO", "1.0")),
+        }
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    queue_handler = _NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(_SamplingFilter(sample_rates))
+    queue_handler.addFilter(_ContextFilter())
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    outputs = root.handlers[:]
+    for handler in outputs:
+        root.removeHandler(handler)
+    if not outputs:
+        output = logging.StreamHandler()
+        output.setFormatter(JsonFormatter())
+        outputs = [output]
+    root.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, *outputs, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
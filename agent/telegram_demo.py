@@ -15,6 +15,7 @@ Features:
 """
 
 import sys
+from observability import setup_logging
 from telegram_service import get_telegram_service
 
 
@@ -31,6 +32,8 @@ def main():
     print("=" * 50)
     print()
     
+    setup_logging()
+
     # Get the telegram service
     telegram = get_telegram_service()
     
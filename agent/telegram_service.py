@@ -14,12 +14,11 @@ from typing import Callable, Optional
 
 import requests
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from observability import get_tracer
+
+# Logging is configured by the entry point (see observability.setup_logging)
 logger = logging.getLogger("telegram-service")
+tracer = get_tracer()
 
 
 class TelegramService:
@@ -30,6 +29,8 @@ class TelegramService:
     - send_message(): Send text to configured contact
     - poll_messages(): Get new messages since last poll
     - start_listener(): Background thread for continuous polling
+    - confirm_updates(): Acknowledge polled updates without fetching more
+    - wait_for_sends(): Used when draining on shutdown
     """
     
     # Hardcoded configuration for Rana's contact
@@ -43,6 +44,9 @@ class TelegramService:
         self.last_update_id: Optional[int] = None
         self._listener_thread: Optional[threading.Thread] = None
         self._listener_running = False
+        # Outbound sends in progress, so shutdown can wait for them
+        self._sends_in_flight = 0
+        self._sends_done = threading.Condition()
         
     def send_message(self, text: str) -> bool:
         """
@@ -54,6 +58,8 @@ class TelegramService:
         Returns:
             True if message sent successfully, False otherwise
         """
+        with self._sends_done:
+            self._sends_in_flight += 1
         try:
             url = f"{self.BASE_URL}/sendMessage"
             payload = {
@@ -61,20 +67,36 @@ class TelegramService:
                 "text": text
             }
             
-            response = requests.post(url, json=payload, timeout=10)
-            response.raise_for_status()
+            with tracer.span("telegram.send", text_chars=len(text)) as span:
+                response = requests.post(url, json=payload, timeout=10)
+                span.set(http_status=response.status_code)
+                response.raise_for_status()
             
             result = response.json()
             if result.get("ok"):
-                logger.info(f"Message sent to {self.CONTACT_NAME}: {text[:50]}...")
+                logger.info("Message sent to %s", self.CONTACT_NAME, extra={"text_chars": len(text)})
                 return True
             else:
-                logger.error(f"Telegram API error: {result}")
+                logger.error("Telegram API error: %s", result)
                 return False
                 
         except requests.RequestException as e:
-            logger.error(f"Failed to send message: {e}")
+            logger.error("Failed to send message: %s", e)
             return False
+        finally:
+            with self._sends_done:
+                self._sends_in_flight -= 1
+                self._sends_done.notify_all()
+
+    def wait_for_sends(self, timeout: float) -> bool:
+        """
+        Block until no sends are in progress.
+        
+        Returns:
+            True if all sends finished within the timeout, False otherwise
+        """
+        with self._sends_done:
+            return self._sends_done.wait_for(lambda: self._sends_in_flight == 0, timeout=timeout)
     
     def poll_messages(self) -> list[dict]:
         """
@@ -99,7 +121,7 @@ class TelegramService:
             
             result = response.json()
             if not result.get("ok"):
-                logger.error(f"Telegram API error: {result}")
+                logger.error("Telegram API error: %s", result)
                 return []
             
             messages = []
@@ -115,7 +137,7 @@ class TelegramService:
                 # Only accept messages from configured chat
                 chat_id = message.get("chat", {}).get("id")
                 if chat_id != self.CONTACT_CHAT_ID:
-                    logger.debug(f"Ignoring message from chat_id: {chat_id}")
+                    logger.debug("Ignoring message from chat_id: %s", chat_id)
                     continue
                 
                 # Get message text
@@ -123,7 +145,7 @@ class TelegramService:
                 
                 # Skip commands (like /start)
                 if text.startswith("/"):
-                    logger.debug(f"Ignoring command: {text}")
+                    logger.debug("Ignoring command", extra={"text_chars": len(text)})
                     continue
                 
                 # Skip empty messages
@@ -146,14 +168,37 @@ class TelegramService:
                     "timestamp": timestamp_str
                 })
                 
-                logger.info(f"New message from {from_name}: {text[:50]}...")
+                logger.debug("New message received", extra={"text_chars": len(text)})
             
             return messages
             
         except requests.RequestException as e:
-            logger.error(f"Failed to poll messages: {e}")
+            logger.error("Failed to poll messages: %s", e)
             return []
     
+    def confirm_updates(self) -> bool:
+        """
+        Tell Telegram that every update polled so far has been handled.
+        
+        Telegram only drops an update once getUpdates is called with a higher
+        offset, so without this the last polled batch is delivered again to
+        the next session. Updates not yet polled stay unacknowledged.
+        
+        Returns:
+            True if there was nothing to confirm or the call succeeded
+        """
+        if self.last_update_id is None:
+            return True
+        try:
+            url = f"{self.BASE_URL}/getUpdates"
+            params = {"offset": self.last_update_id + 1, "timeout": 0, "limit": 1}
+            response = requests.get(url, params=params, timeout=10)
+            response.raise_for_status()
+            return bool(response.json().get("ok"))
+        except requests.RequestException as e:
+            logger.error("Failed to confirm updates: %s", e)
+            return False
+    
     def start_listener(self, callback: Callable[[dict], None], poll_interval: int = 2) -> None:
         """
         Start background listener that polls for new messages.
@@ -178,9 +223,9 @@ class TelegramService:
                         try:
                             callback(msg)
                         except Exception as e:
-                            logger.error(f"Callback error: {e}")
+                            logger.error("Callback error: %s", e)
                 except Exception as e:
-                    logger.error(f"Listener error: {e}")
+                    logger.error("Listener error: %s", e)
                 
                 time.sleep(poll_interval)
             
@@ -126,12 +126,12 @@ function MicrophoneToggle() {
 function RoomContent({ onDisconnect }: { onDisconnect: () => void }) {
   const room = useRoomContext();
 
-  // Browser state - separate VNC credentials from active browsing state
-  const [vncHostname, setVncHostname] = useState<string>("");
-  const [vncPassword, setVncPassword] = useState<string>("");
-  const [hasVncCredentials, setHasVncCredentials] = useState(false);
+  // Browser state - the screen itself arrives as a video track
   const [browserActive, setBrowserActive] = useState(false);
 
+  // Set when the agent is shutting down (e.g. during a deploy)
+  const [agentDraining, setAgentDraining] = useState(false);
+
   // Speaking state for glow effect
   const [isSpeaking, setIsSpeaking] = useState(false);
   const speakingTimeoutRef = useRef<NodeJS.Timeout | null>(null);
@@ -199,14 +199,12 @@ function RoomContent({ onDisconnect }: { onDisconnect: () => void }) {
         const data = JSON.parse(new TextDecoder().decode(payload));
         console.log("[DEBUG] Received data message:", data.type);
 
-        if (data.type === 'browser_ready') {
-          setVncHostname(data.hostname);
-          setVncPassword(data.password);
-          setHasVncCredentials(true);
-        } else if (data.type === 'browser_task_started') {
+        if (data.type === 'browser_task_started') {
           setBrowserActive(true);
         } else if (data.type === 'browser_task_completed') {
           setBrowserActive(false);
+        } else if (data.type === 'agent_draining') {
+          setAgentDraining(data.stage !== 'completed');
         }
       } catch (e) {
         console.error("Failed to parse data message:", e);
@@ -235,18 +233,20 @@ function RoomContent({ onDisconnect }: { onDisconnect: () => void }) {
             Browsing
           </span>
         )}
+        {agentDraining && (
+          <span className="px-2.5 py-1.5 text-xs font-medium bg-amber-500/10 text-amber-400 rounded-full border border-amber-500/20 flex items-center gap-1.5 backdrop-blur-md">
+            <span className="w-1.5 h-1.5 rounded-full bg-amber-400 animate-pulse" />
+            Restarting
+          </span>
+        )}
       </header>
 
       {/* Main content - Avatar centered with glow effect */}
       <main className="flex-1 flex items-center justify-center p-4 md:p-8 overflow-hidden relative">
         {/* Browser - full screen when active */}
-        {browserActive && hasVncCredentials && (
+        {browserActive && (
           <div className="absolute inset-4 md:inset-8 z-0 transition-all duration-500 ease-out rounded-3xl overflow-hidden">
-            <BrowserDisplay
-              hostname={vncHostname}
-              password={vncPassword}
-              isVisible={true}
-            />
+            <BrowserDisplay isVisible={true} />
           </div>
         )}
 